@@ -0,0 +1,384 @@
+#! /usr/bin/python
+
+__author__="Tom Bell <tom.bell.code@gmail.com>"
+__date__ ="$Oct 18, 2026"
+
+import os
+import sys
+import mmap
+import array
+import struct
+import hashlib
+import multiprocessing
+
+"""
+Tokenize a corpus file into a binary cache of token id arrays that can be
+loaded by mmap, so that repeated runs over the same corpus skip parsing the
+text entirely. The cache is rebuilt automatically when the source changes.
+
+Cache file layout (all numbers little-endian):
+
+    header    magic, format version, source size, source mtime,
+              source SHA-1, number of sentences, tokens and vocabulary words,
+              length of the vocabulary block
+    vocab     the vocabulary words, UTF-8 encoded and separated by newlines;
+              a word's token id is its position in this list
+    padding   zero bytes up to the next 4-byte boundary
+    offsets   (sentences + 1) uint32 values; sentence k is made up of the
+              token ids in the range [offsets[k], offsets[k+1])
+    ids       uint32 token ids for all sentences, one after the other
+"""
+
+# Debug output flag
+debug = False
+
+# Identifies corpus cache files and their layout version; bump the version
+# whenever the layout changes so that old caches are rebuilt
+MAGIC = b"TMCORPUS"
+VERSION = 2
+
+# Extension appended to the source file name to give the cache file name
+EXTENSION = ".cache"
+
+# Source files are split into chunks of roughly this many bytes, which are
+# tokenized in parallel; smaller files are tokenized in a single process
+CHUNK_SIZE = 4 * 1024 * 1024
+
+HEADER = struct.Struct("<8sIQd20sIIIQ")
+
+
+def cache_file_name(source_file):
+    """
+    Return the name of the cache file for the specified source file.
+    """
+    return source_file + EXTENSION
+
+def checksum(source_file):
+    """
+    Return the SHA-1 digest of the contents of the specified source file.
+    """
+    digest = hashlib.sha1()
+    file = open(source_file, 'rb')
+    for block in iter(lambda: file.read(1024 * 1024), b""):
+        digest.update(block)
+    file.close()
+    return digest.digest()
+
+def to_bytes(values):
+    """
+    Return the little-endian bytes of an array of uint32 values.
+    """
+    if sys.byteorder == 'big':
+        values = array.array('I', values)
+        values.byteswap()
+    if hasattr(values, 'tobytes'):
+        return values.tobytes()
+    return values.tostring()
+
+def find_chunks(source_file, chunk_size=None):
+    """
+    Split the source file into (start, end) byte ranges of roughly the
+    given size, or CHUNK_SIZE by default, with every range ending just
+    after a newline character.
+    """
+    if chunk_size is None: chunk_size = CHUNK_SIZE
+    size = os.path.getsize(source_file)
+    chunks = []
+    file = open(source_file, 'rb')
+    start = 0
+    while start < size:
+        end = start + chunk_size
+        if end >= size:
+            end = size
+        else:
+            file.seek(end)
+            file.readline()
+            end = min(file.tell(), size)
+        chunks.append((start, end))
+        start = end
+    file.close()
+    return chunks
+
+def tokenize_chunk(job):
+    """
+    Tokenize the sentences in one (source_file, start, end) byte range of a
+    source file. Return the chunk's own vocabulary, in order of first
+    appearance, together with the sentence offsets and local token ids.
+    """
+    source_file, start, end = job
+    file = open(source_file, 'rb')
+    file.seek(start)
+    text = file.read(end - start).decode('utf-8')
+    file.close()
+
+    vocab = {}
+    offsets = array.array('I', [0])
+    ids = array.array('I')
+    for line in text.splitlines():
+        for word in line.split():
+            ids.append(vocab.setdefault(word, len(vocab)))
+        offsets.append(len(ids))
+
+    words = sorted(vocab, key=vocab.get)
+    return words, offsets, ids
+
+def merge_chunks(chunks):
+    """
+    Merge the tokenized chunks into a single vocabulary, renumbering the
+    local token ids of each chunk and concatenating the sentence offsets.
+    """
+    vocab = {}
+    offsets = array.array('I', [0])
+    ids = array.array('I')
+    for words, chunk_offsets, chunk_ids in chunks:
+        mapping = [vocab.setdefault(word, len(vocab)) for word in words]
+        base = len(ids)
+        ids.extend(mapping[i] for i in chunk_ids)
+        offsets.extend(base + o for o in chunk_offsets[1:])
+
+    words = sorted(vocab, key=vocab.get)
+    return words, offsets, ids
+
+def build_cache(source_file, processes=None):
+    """
+    Tokenize the source file, in parallel chunks where it is large enough,
+    and return the binary corpus cache, which is also written alongside the
+    source file unless that fails, e.g. in a read-only directory.
+    """
+    if debug: sys.stdout.write("Building corpus cache for %s...\n" % source_file)
+
+    stat = os.stat(source_file)
+    digest = checksum(source_file)
+    jobs = [(source_file, start, end) for (start, end) in find_chunks(source_file)]
+
+    if processes == 1 or len(jobs) <= 1:
+        chunks = [tokenize_chunk(job) for job in jobs]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            chunks = pool.map(tokenize_chunk, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+    words, offsets, ids = merge_chunks(chunks)
+    if debug:
+        sys.stdout.write(" -> %d sentences, %d tokens, %d words in %d chunk(s)\n"
+                         % (len(offsets) - 1, len(ids), len(words), len(jobs)))
+
+    vocab = "\n".join(words).encode('utf-8')
+    header = HEADER.pack(MAGIC, VERSION, stat.st_size, stat.st_mtime, digest,
+                         len(offsets) - 1, len(ids), len(words), len(vocab))
+    padding = -(len(header) + len(vocab)) % 4
+
+    data = b"".join([header, vocab, b"\0" * padding,
+                     to_bytes(offsets), to_bytes(ids)])
+
+    # Write to a temporary file first so that an interrupted
+    # build never leaves a truncated cache file behind
+    cache_file = cache_file_name(source_file)
+    temp_file = "%s.%d.tmp" % (cache_file, os.getpid())
+    try:
+        file = open(temp_file, 'wb')
+        try:
+            file.write(data)
+        finally:
+            file.close()
+        replace(temp_file, cache_file)
+    except (IOError, OSError):
+        if debug: sys.stdout.write("Unable to write corpus cache %s\n" % cache_file)
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+    return data
+
+def replace(source, destination):
+    """
+    Rename the source file to the destination, replacing any existing file.
+    """
+    try:
+        os.rename(source, destination)
+    except OSError:
+        # Windows will not rename over an existing file
+        if not os.path.exists(destination):
+            raise
+        os.remove(destination)
+        os.rename(source, destination)
+
+def read_header(cache_file):
+    """
+    Return the unpacked header fields of the cache file, or None if the
+    file does not exist or was not written by this version of the code.
+    """
+    try:
+        file = open(cache_file, 'rb')
+    except (IOError, OSError):
+        return None
+    data = file.read(HEADER.size)
+    file.close()
+    return parse_header(data)
+
+def parse_header(data):
+    """
+    Return the unpacked header fields at the start of the cache data, or
+    None if the data was not written by this version of the code.
+    """
+    data = data[:HEADER.size]
+    if len(data) != HEADER.size:
+        return None
+    header = HEADER.unpack(data)
+    if header[:2] != (MAGIC, VERSION):
+        return None
+    return header
+
+def is_current(source_file):
+    """
+    Check whether the cache for the source file exists and matches its
+    contents. The file size and modification time are compared first and
+    the checksum is only recalculated if the modification time alone has
+    changed, in which case the cache header is updated to match.
+    """
+    header = read_header(cache_file_name(source_file))
+    if header is None:
+        return False
+    size, mtime, digest = header[2:5]
+    stat = os.stat(source_file)
+    if stat.st_size != size:
+        return False
+    if stat.st_mtime == mtime:
+        return True
+    if checksum(source_file) != digest:
+        return False
+
+    # Record the new modification time so the next check takes the fast path
+    header = HEADER.pack(*(header[:3] + (stat.st_mtime,) + header[4:]))
+    try:
+        file = open(cache_file_name(source_file), 'r+b')
+        try:
+            file.write(header)
+        finally:
+            file.close()
+    except (IOError, OSError):
+        pass
+    return True
+
+class Corpus:
+    """
+    A tokenized corpus backed by the contents of a cache file, either
+    memory-mapped or held in memory. The token ids are unpacked on demand,
+    so nothing returned by the corpus refers to the underlying data and it
+    can be closed at any time.
+    """
+    def __init__(self, data):
+        header = parse_header(data)
+        if header is None:
+            raise ValueError("not a valid corpus cache")
+        self.n, num_tokens, num_words, vocab_size = header[5:]
+        self.map = data
+
+        start = HEADER.size
+        vocab = self.map[start:start + vocab_size].decode('utf-8')
+        self.vocab = vocab.split("\n") if num_words else []
+
+        start += vocab_size
+        self.offsets = start + -start % 4
+        self.ids = self.offsets + 4 * (self.n + 1)
+
+    def __len__(self):
+        return self.n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def sentence_ids(self, k):
+        """
+        Return the token ids of sentence k as a tuple.
+        """
+        if not 0 <= k < self.n:
+            raise IndexError("sentence index out of range")
+        start, end = struct.unpack_from("<2I", self.map, self.offsets + 4 * k)
+        return struct.unpack_from("<%dI" % (end - start), self.map,
+                                  self.ids + 4 * start)
+
+    def sentence(self, k):
+        """
+        Return sentence k as a list of words.
+        """
+        vocab = self.vocab
+        return [vocab[i] for i in self.sentence_ids(k)]
+
+    def sentences(self):
+        """
+        Return the list of all sentences, each as a list of words.
+        """
+        return [self.sentence(k) for k in range(self.n)]
+
+    def close(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+
+def load_cache(cache_file):
+    """
+    Open the corpus stored in the cache file by memory-mapping it.
+    """
+    file = open(cache_file, 'rb')
+    try:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        file.close()
+    try:
+        return Corpus(data)
+    except ValueError:
+        data.close()
+        raise ValueError("%s is not a valid corpus cache" % cache_file)
+
+def open_corpus(source_file, processes=None):
+    """
+    Open the cached corpus for the source file, (re)building the
+    cache first if it is missing or the source file has changed.
+    """
+    if not is_current(source_file):
+        return Corpus(build_cache(source_file, processes))
+    if debug: sys.stdout.write("Using corpus cache for %s...\n" % source_file)
+    return load_cache(cache_file_name(source_file))
+
+def read_corpus(source_file, processes=None):
+    """
+    Return the sentences of the source file as lists of words,
+    loaded from the corpus cache wherever possible.
+    """
+    with open_corpus(source_file, processes) as corpus:
+        return corpus.sentences()
+
+def main(source_files, processes=None):
+    """
+    Build or refresh the corpus cache for each of the source files.
+    """
+    for source_file in source_files:
+        if is_current(source_file):
+            sys.stdout.write("Corpus cache for %s is up to date.\n" % source_file)
+        else:
+            sys.stdout.write("Building corpus cache for %s...\n" % source_file)
+            build_cache(source_file, processes)
+
+def usage():
+    sys.stderr.write("""
+    Usage: python corpus_cache.py [-j processes] [corpus_file] ...
+        Tokenize each corpus file, in parallel chunks where it is large, and
+        write a binary cache of token ids next to it; the cache is loaded by
+        the other scripts and rebuilt automatically if the file changes.\n""")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    processes = None
+    if len(args) >= 2 and args[0] == "-j":
+        processes = int(args[1])
+        args = args[2:]
+    if len(args) == 0 or (processes is not None and processes < 1):
+        usage()
+        sys.exit(1)
+    main(args, processes)
@@ -5,6 +5,7 @@ __date__ ="$Apr 28, 2013"
 
 import sys
 import codecs
+import corpus_cache
 
 """
 Estimate the parameters for IBM translation model 1 or 2 using the iterative
@@ -28,25 +29,15 @@ class EM:
 
     def read_corpus(self, english_file, foreign_file):
         """
-        Construct the lists of parallel english and foreign sentences and
-        add the entries to t(f|e) for each english word and the foreign
-        words that appear with it in the parallel translation.
+        Construct the lists of parallel english and foreign sentences,
+        loading them from the binary corpus caches, which are (re)built
+        from the text files when missing or out of date.
         """
         sys.stdout.write("Reading both parallel corpus files...\n")
 
-        # Create the list of english sentences
-        english_file.seek(0)
-        for line in english_file:
-            sentence = line.split()
-            self.e.append(sentence)
-        english_file.close()
-
-        # Create the list of parallel foreign translations
-        foreign_file.seek(0)
-        for line in foreign_file:
-            sentence = line.split()
-            self.f.append(sentence)
-        foreign_file.close()
+        # Create the lists of english sentences and parallel foreign translations
+        self.e = corpus_cache.read_corpus(english_file)
+        self.f = corpus_cache.read_corpus(foreign_file)
 
         # Check there are equal numbers of english and foreign sentences
         self.n = len(self.e)
@@ -249,11 +240,8 @@ def main(english_file, foreign_file):
     """
     estimator = EM(model=2)
 
-    file1 = codecs.open(english_file, encoding='utf-8', mode='r')
-    file2 = codecs.open(foreign_file, encoding='utf-8', mode='r')
-
     # Read the corpus files and construct the english and foreign sentence lists
-    estimator.read_corpus(file1, file2)
+    estimator.read_corpus(english_file, foreign_file)
 
     # Create the t(f|e) and q(j|i,l,m) parameter entries
     estimator.create_parameters()
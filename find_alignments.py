@@ -5,6 +5,7 @@ __date__ ="$Apr 28, 2013"
 
 import sys
 import codecs
+import corpus_cache
 
 """
 Find alignments for the english and foreign words in parallel translations
@@ -92,17 +93,9 @@ def main(parameter_file, english_file, foreign_file):
     # Read the previously determined t(f|e) and q(j|i,l,m) parameter values
     parser.read_parameters(parameter_file)
 
-    e = [] ; f = []
-    file = codecs.open(english_file, encoding='utf-8', mode='r')
-    for line in file:
-        sentence = line.split()
-        e.append(sentence)
-    file.close()
-    file = codecs.open(foreign_file, encoding='utf-8', mode='r')
-    for line in file:
-        sentence = line.split()
-        f.append(sentence)
-    file.close()
+    # Read the english and foreign sentences from the corpus caches
+    e = corpus_cache.read_corpus(english_file)
+    f = corpus_cache.read_corpus(foreign_file)
 
     # Find the most likely alignments for each sentence pair
     for k in range(len(e)):
@@ -0,0 +1,163 @@
+#! /usr/bin/python
+
+__author__="Tom Bell <tom.bell.code@gmail.com>"
+__date__ ="$Oct 18, 2026"
+
+import os
+import codecs
+import shutil
+import tempfile
+import unittest
+
+import corpus_cache
+
+"""
+Tests for the binary corpus cache: python -m unittest test_corpus_cache
+"""
+
+# Directory containing the corpus files shipped with the repository
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+def split_lines(source_file):
+    """
+    Read the source file the way the scripts did before the corpus cache.
+    """
+    file = codecs.open(source_file, encoding='utf-8', mode='r')
+    sentences = [line.split() for line in file]
+    file.close()
+    return sentences
+
+class CorpusCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.chunk_size = corpus_cache.CHUNK_SIZE
+
+    def tearDown(self):
+        corpus_cache.CHUNK_SIZE = self.chunk_size
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        source_file = os.path.join(self.directory, name)
+        file = open(source_file, 'wb')
+        file.write(data)
+        file.close()
+        return source_file
+
+    def copy(self, name):
+        source_file = os.path.join(self.directory, name)
+        shutil.copy(os.path.join(DIRECTORY, name), source_file)
+        return source_file
+
+    def test_round_trip(self):
+        texts = {
+            'lf':       b"the house\nla casa\n",
+            'crlf':     b"the house\r\nthe  green house \r\n",
+            'no_eol':   b"the house\nthe green house",
+            'empty':    b"",
+            'blank':    b"\nthe house\n\n  \nla casa\n\n",
+            'unicode':  u"el ni\u00f1o est\u00e1 aqu\u00ed\nr\u00e1pido\n".encode('utf-8'),
+        }
+        for name in sorted(texts):
+            source_file = self.write(name, texts[name])
+            expected = split_lines(source_file)
+            self.assertEqual(corpus_cache.read_corpus(source_file), expected, name)
+            self.assertTrue(corpus_cache.is_current(source_file), name)
+            self.assertEqual(corpus_cache.read_corpus(source_file), expected, name)
+
+    def test_chunks_match_single_chunk(self):
+        source_file = self.copy('dev.es')
+        size = os.path.getsize(source_file)
+        single = corpus_cache.merge_chunks(
+            [corpus_cache.tokenize_chunk((source_file, 0, size))])
+
+        chunks = corpus_cache.find_chunks(source_file, 2000)
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], size)
+        jobs = [(source_file, start, end) for (start, end) in chunks]
+        merged = corpus_cache.merge_chunks(
+            [corpus_cache.tokenize_chunk(job) for job in jobs])
+        self.assertEqual(merged, single)
+
+    def test_parallel_build(self):
+        source_file = self.copy('dev.en')
+        corpus_cache.CHUNK_SIZE = 2000
+        corpus_cache.build_cache(source_file, processes=2)
+        self.assertTrue(corpus_cache.is_current(source_file))
+        self.assertEqual(corpus_cache.read_corpus(source_file),
+                         split_lines(source_file))
+
+    def test_touched_file_keeps_cache(self):
+        source_file = self.write('touched', b"the house\nla casa\n")
+        corpus_cache.read_corpus(source_file)
+        os.utime(source_file, (1000000000, 1000000000))
+        self.assertTrue(corpus_cache.is_current(source_file))
+
+        # The new mtime is recorded so the checksum is not needed again
+        checksum = corpus_cache.checksum
+        corpus_cache.checksum = None
+        try:
+            self.assertTrue(corpus_cache.is_current(source_file))
+        finally:
+            corpus_cache.checksum = checksum
+
+    def test_edited_file_rebuilds_cache(self):
+        source_file = self.write('edited', b"the house\nla casa\n")
+        corpus_cache.read_corpus(source_file)
+
+        # Same size, different contents
+        self.write('edited', b"the mouse\nla casa\n")
+        os.utime(source_file, (1000000000, 1000000000))
+        self.assertFalse(corpus_cache.is_current(source_file))
+        self.assertEqual(corpus_cache.read_corpus(source_file),
+                         [['the', 'mouse'], ['la', 'casa']])
+
+        self.write('edited', b"the mouse\nla casa\nthe house\n")
+        self.assertFalse(corpus_cache.is_current(source_file))
+        self.assertEqual(len(corpus_cache.read_corpus(source_file)), 3)
+
+    def test_invalid_cache_is_rejected(self):
+        source_file = self.write('invalid', b"the house\nla casa\n")
+        cache_file = corpus_cache.cache_file_name(source_file)
+        corpus_cache.read_corpus(source_file)
+        file = open(cache_file, 'rb')
+        data = file.read()
+        file.close()
+
+        header = corpus_cache.HEADER.unpack_from(data)
+        for changed in [(b"NOTACACH",) + header[1:],
+                        header[:1] + (corpus_cache.VERSION + 1,) + header[2:]]:
+            file = open(cache_file, 'wb')
+            file.write(corpus_cache.HEADER.pack(*changed))
+            file.write(data[corpus_cache.HEADER.size:])
+            file.close()
+            self.assertFalse(corpus_cache.is_current(source_file))
+            self.assertRaises(ValueError, corpus_cache.load_cache, cache_file)
+            self.assertEqual(corpus_cache.read_corpus(source_file),
+                             [['the', 'house'], ['la', 'casa']])
+            self.assertTrue(corpus_cache.is_current(source_file))
+
+    def test_unwritable_cache(self):
+        source_file = self.write('unwritable', b"the house\nla casa\n")
+
+        def replace(source, destination):
+            raise OSError("read-only")
+        original = corpus_cache.replace
+        corpus_cache.replace = replace
+        try:
+            sentences = corpus_cache.read_corpus(source_file)
+        finally:
+            corpus_cache.replace = original
+        self.assertEqual(sentences, [['the', 'house'], ['la', 'casa']])
+        self.assertEqual(os.listdir(self.directory), ['unwritable'])
+
+    def test_close_with_sentence_ids(self):
+        source_file = self.write('close', b"the house\nla casa\n")
+        corpus_cache.read_corpus(source_file)
+        with corpus_cache.open_corpus(source_file) as corpus:
+            ids = corpus.sentence_ids(1)
+        self.assertEqual(ids, (2, 3))
+        self.assertEqual(corpus.vocab, ['the', 'house', 'la', 'casa'])
+
+if __name__ == "__main__":
+    unittest.main()